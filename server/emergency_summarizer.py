@@ -7,66 +7,149 @@ Provides comprehensive, prioritized summaries optimized for quick clinical decis
 import sys
 import json
 import re
-from typing import Dict, List, Any, Tuple
-from collections import Counter
+from bisect import bisect_left
+from typing import Dict, List, Any, Optional, Tuple, Pattern
 from datetime import datetime, timedelta
+from functools import lru_cache
 
+from json_io import loads, dumps
+
+def _compile_patterns(*patterns: str) -> Tuple[Pattern, ...]:
+    """Compile a category's term patterns once.
+
+    Patterns are lowercase and run against lowered text, so no IGNORECASE.
+    """
+    return tuple(re.compile(p) for p in patterns)
+
+# Medical term patterns, compiled once at import
+_DISEASE_PATTERNS = _compile_patterns(
+    r'\b(?:acute|chronic|severe|mild|primary|secondary)\s+\w+(?:\s+\w+)?\b',
+    r'\b(?:hypertension|diabetes|asthma|pneumonia|bronchitis|gastritis|dengue|arthritis|anemia|appendicitis|migraine|thyroid|fracture)\b',
+    r'\b(?:infection|inflammation|disorder|syndrome|disease|condition|fever)\b'
+)
+
+_TREATMENT_PATTERNS = _compile_patterns(
+    r'\b(?:prescribed|administered|given|recommended)\s+\w+\b',
+    r'\b(?:antibiotics|medication|therapy|surgery|procedure|treatment)\b',
+    r'\b(?:insulin|aspirin|ibuprofen|acetaminophen|steroids|inhalers)\b'
+)
+
+_SYMPTOM_PATTERNS = _compile_patterns(
+    r'\b(?:cough|fever|pain|nausea|headache|dizziness|fatigue|weakness)\b',
+    r'\b(?:shortness of breath|chest pain|abdominal pain)\b',
+    r'\b(?:vomiting|diarrhea|bleeding|swelling|rash)\b'
+)
+
+_WARNING_PATTERNS = _compile_patterns(
+    r'\b(?:warning|caution|contraindication|avoid|do not|allergic)\b',
+    r'\b(?:emergency|urgent|immediate|critical|life-threatening)\b',
+    r'\b(?:monitor|watch for|check|observe)\b'
+)
+
+# Record field labels mapped to the keys used in parsed records
+_RECORD_FIELDS = {
+    'date': 'date',
+    'disease': 'disease',
+    'description': 'description',
+    'treatment': 'treatment',
+    'risk level': 'risk',
+    'warning': 'warnings',
+    'warnings': 'warnings',
+}
+
+# Keywords marking a description sentence as a clinical warning
+_WARNING_KEYWORDS = ('warning', 'caution', 'avoid', 'do not', 'contraindication', 'emergency', 'monitor', 'immediate')
+
+def _parse_numeric_date(date_str: str) -> Optional[datetime]:
+    """Parse fixed-width MM/DD/YYYY or YYYY-MM-DD dates without strptime."""
+    if len(date_str) != 10 or not date_str.isascii():
+        return None
+    if date_str[2] == date_str[5] == '/':
+        month, day, year = date_str[0:2], date_str[3:5], date_str[6:10]
+    elif date_str[4] == date_str[7] == '-':
+        year, month, day = date_str[0:4], date_str[5:7], date_str[8:10]
+    else:
+        return None
+    if not (year + month + day).isdigit():
+        return None
+    try:
+        return datetime(int(year), int(month), int(day))
+    except ValueError:
+        # e.g. a DD/MM/YYYY date; let the format loop handle it
+        return None
+
+# Date used for records whose date is missing or cannot be parsed
+_MIN_DATE = datetime(1900, 1, 1)
+
+# Timeline buckets indexed by how many cutoffs a record's date is newer than
+_TIMELINE_BUCKETS = ('older', 'last_90_days', 'last_30_days', 'last_7_days')
+
+@lru_cache(maxsize=4096)
 def parse_date(date_str: str) -> datetime:
     """Parse date string to datetime object."""
     try:
-        # Try common date formats
-        for fmt in ["%m/%d/%Y", "%Y-%m-%d", "%d/%m/%Y", "%B %d, %Y"]:
+        parsed = _parse_numeric_date(date_str)
+        if parsed:
+            return parsed
+        
+        # Only try the formats whose separators appear in the string
+        if '-' in date_str:
+            formats = ("%Y-%m-%d",)
+        elif ',' in date_str:
+            formats = ("%B %d, %Y",)
+        else:
+            formats = ("%m/%d/%Y", "%d/%m/%Y")
+        for fmt in formats:
             try:
                 return datetime.strptime(date_str, fmt)
             except ValueError:
                 continue
         # If all formats fail, return a very old date
-        return datetime(1900, 1, 1)
+        return _MIN_DATE
     except:
-        return datetime(1900, 1, 1)
+        return _MIN_DATE
+
+def parse_record(record_text: str) -> Dict[str, Any]:
+    """Parse one history record into a dict of its known fields."""
+    record_data = {'text': record_text}
+    
+    # Fields are line-oriented "Key: value" pairs; keep the first of each.
+    # Splitting lines is cheaper than one combined field regex, which has
+    # to scan the long description bodies character by character.
+    for line in record_text.splitlines():
+        label, _, value = line.partition(':')
+        key = _RECORD_FIELDS.get(label.strip().lower())
+        value = value.strip()
+        if key and value and key not in record_data:
+            record_data[key] = value
+    
+    if 'date' in record_data:
+        record_data['date'] = parse_date(record_data['date'])
+    
+    return record_data
 
 def extract_medical_terms(text: str) -> Dict[str, List[str]]:
     """Extract medical terms using enhanced regex patterns."""
     
-    # Enhanced disease patterns
-    disease_patterns = [
-        r'\b(?:acute|chronic|severe|mild|primary|secondary)\s+\w+(?:\s+\w+)?\b',
-        r'\b(?:hypertension|diabetes|asthma|pneumonia|bronchitis|gastritis|dengue|arthritis|anemia|appendicitis|migraine|thyroid|fracture)\b',
-        r'\b(?:infection|inflammation|disorder|syndrome|disease|condition|fever)\b'
-    ]
-    
-    # Treatment patterns
-    treatment_patterns = [
-        r'\b(?:prescribed|administered|given|recommended)\s+\w+\b',
-        r'\b(?:antibiotics|medication|therapy|surgery|procedure|treatment)\b',
-        r'\b(?:insulin|aspirin|ibuprofen|acetaminophen|steroids|inhalers)\b'
-    ]
-    
-    # Symptom patterns
-    symptom_patterns = [
-        r'\b(?:cough|fever|pain|nausea|headache|dizziness|fatigue|weakness)\b',
-        r'\b(?:shortness of breath|chest pain|abdominal pain)\b',
-        r'\b(?:vomiting|diarrhea|bleeding|swelling|rash)\b'
-    ]
-    
-    # Warning/contraindication patterns
-    warning_patterns = [
-        r'\b(?:warning|caution|contraindication|avoid|do not|allergic)\b',
-        r'\b(?:emergency|urgent|immediate|critical|life-threatening)\b',
-        r'\b(?:monitor|watch for|check|observe)\b'
-    ]
-    
-    def find_matches(patterns: List[str], text: str) -> List[str]:
-        matches = []
+    # Match against a lowered copy but report terms in their original case,
+    # unless lowering changed the length and the offsets no longer line up
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        text = lowered
+    
+    def find_matches(patterns: Tuple[Pattern, ...], lowered: str, text: str) -> List[str]:
+        # Spans found in lowered are sliced out of text, which has equal length
+        matches = set()
         for pattern in patterns:
-            matches.extend(re.findall(pattern, text, re.IGNORECASE))
-        return list(set(matches))
+            for match in pattern.finditer(lowered):
+                matches.add(text[match.start():match.end()])
+        return list(matches)
     
     return {
-        'diseases': find_matches(disease_patterns, text),
-        'treatments': find_matches(treatment_patterns, text),
-        'symptoms': find_matches(symptom_patterns, text),
-        'warnings': find_matches(warning_patterns, text)
+        'diseases': find_matches(_DISEASE_PATTERNS, lowered, text),
+        'treatments': find_matches(_TREATMENT_PATTERNS, lowered, text),
+        'symptoms': find_matches(_SYMPTOM_PATTERNS, lowered, text),
+        'warnings': find_matches(_WARNING_PATTERNS, lowered, text)
     }
 
 def extract_warnings_from_description(description: str) -> List[str]:
@@ -77,7 +160,7 @@ def extract_warnings_from_description(description: str) -> List[str]:
     sentences = description.split('.')
     for sentence in sentences:
         lower_sent = sentence.lower()
-        if any(keyword in lower_sent for keyword in ['warning', 'caution', 'avoid', 'do not', 'contraindication', 'emergency', 'monitor', 'immediate']):
+        if any(keyword in lower_sent for keyword in _WARNING_KEYWORDS):
             warnings.append(sentence.strip())
     
     return warnings
@@ -92,22 +175,17 @@ def categorize_by_timeline(records: List[Dict]) -> Dict[str, List[Dict]]:
         'older': []
     }
     
+    # (now - date).days <= N is the same as date > now - (N + 1) days, so each
+    # record is placed by bisecting fixed cutoffs instead of building a timedelta
+    cutoffs = [now - timedelta(days=91), now - timedelta(days=31), now - timedelta(days=8)]
+    
     for record in records:
         date = record.get('date')
         if not date:
             categories['older'].append(record)
             continue
-            
-        days_ago = (now - date).days
         
-        if days_ago <= 7:
-            categories['last_7_days'].append(record)
-        elif days_ago <= 30:
-            categories['last_30_days'].append(record)
-        elif days_ago <= 90:
-            categories['last_90_days'].append(record)
-        else:
-            categories['older'].append(record)
+        categories[_TIMELINE_BUCKETS[bisect_left(cutoffs, date)]].append(record)
     
     return categories
 
@@ -131,17 +209,23 @@ def categorize_by_risk_level(records: List[Dict]) -> Dict[str, List[Dict]]:
 
 def analyze_patterns(records: List[Dict]) -> Dict[str, Any]:
     """Analyze patterns in patient history."""
-    diseases = [r.get('disease', '') for r in records if r.get('disease')]
-    risks = [r.get('risk', 'low') for r in records if r.get('risk')]
+    risk_order = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+    
+    # Count conditions and collect risk values in one pass over the records
+    disease_counts = {}
+    risk_values = []
+    for record in records:
+        disease = record.get('disease')
+        if disease:
+            disease_counts[disease] = disease_counts.get(disease, 0) + 1
+        risk = record.get('risk')
+        if risk:
+            risk_values.append(risk_order.get(risk.lower(), 1))
     
     # Find recurring conditions
-    disease_counts = Counter(diseases)
     recurring = [disease for disease, count in disease_counts.items() if count > 1]
     
     # Analyze risk progression
-    risk_order = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
-    risk_values = [risk_order.get(r.lower(), 1) for r in risks if r]
-    
     risk_trend = "stable"
     if len(risk_values) >= 2:
         recent_avg = sum(risk_values[-3:]) / min(3, len(risk_values[-3:]))
@@ -169,82 +253,53 @@ def generate_emergency_summary(patient_history: str, emergency_mode: bool = True
         return "No medical records found to summarize."
     
     # Parse records into structured data
-    records = []
-    for record_text in record_texts:
-        record_data = {'text': record_text}
-        
-        # Extract date
-        date_match = re.search(r'Date:\s*(.+?)(?:\n|$)', record_text)
-        if date_match:
-            record_data['date'] = parse_date(date_match.group(1).strip())
-        
-        # Extract disease
-        disease_match = re.search(r'Disease:\s*(.+?)(?:\n|$)', record_text)
-        if disease_match:
-            record_data['disease'] = disease_match.group(1).strip()
-        
-        # Extract description
-        desc_match = re.search(r'Description:\s*(.+?)(?:\n|Treatment:|$)', record_text, re.DOTALL)
-        if desc_match:
-            record_data['description'] = desc_match.group(1).strip()
-        
-        # Extract treatment
-        treatment_match = re.search(r'Treatment:\s*(.+?)(?:\n|$)', record_text)
-        if treatment_match:
-            record_data['treatment'] = treatment_match.group(1).strip()
-        
-        # Extract risk level
-        risk_match = re.search(r'Risk Level:\s*(.+?)(?:\n|$)', record_text)
-        if risk_match:
-            record_data['risk'] = risk_match.group(1).strip()
-        
-        # Extract warnings
-        warning_match = re.search(r'Warnings?:\s*(.+?)(?:\n|$)', record_text)
-        if warning_match:
-            record_data['warnings'] = warning_match.group(1).strip()
-        
-        records.append(record_data)
+    records = [parse_record(record_text) for record_text in record_texts]
     
     # Sort records by date (most recent first)
-    records.sort(key=lambda x: x.get('date', datetime(1900, 1, 1)), reverse=True)
+    records.sort(key=lambda x: x.get('date', _MIN_DATE), reverse=True)
     
     # Categorize records
     timeline_categories = categorize_by_timeline(records)
     risk_categories = categorize_by_risk_level(records)
     patterns = analyze_patterns(records)
     
-    # Extract all medical terms
-    all_terms = {
-        'diseases': [],
-        'treatments': [],
-        'symptoms': [],
-        'warnings': []
-    }
-    
-    all_warnings = []
+    # Extract all medical terms. No pattern can match across a '---'
+    # separator, so one scan of the whole history finds the same terms as
+    # scanning each record and merging the results. A character whose
+    # lowercase is longer (e.g. "İ") makes extract_medical_terms report
+    # lowercased terms, so such histories are scanned record by record to
+    # keep the damage inside the affected records.
+    if len(patient_history.lower()) == len(patient_history):
+        term_texts = [patient_history]
+    else:
+        term_texts = record_texts
+    all_terms = {'diseases': set(), 'treatments': set(), 'symptoms': set(), 'warnings': set()}
+    for text in term_texts:
+        for key, terms in extract_medical_terms(text).items():
+            all_terms[key].update(terms)
+    
+    all_warnings = set()
     for record in records:
-        text = record.get('text', '')
-        terms = extract_medical_terms(text)
-        for key in all_terms:
-            all_terms[key].extend(terms.get(key, []))
-        
         # Extract warnings from descriptions
         desc = record.get('description', '')
         if desc:
             warnings = extract_warnings_from_description(desc)
-            all_warnings.extend(warnings)
+            all_warnings.update(warnings)
         
         # Add explicit warnings
         if record.get('warnings'):
-            all_warnings.append(record['warnings'])
+            all_warnings.add(record['warnings'])
+    
+    all_warnings = list(all_warnings)
     
-    # Remove duplicates
-    for key in all_terms:
-        all_terms[key] = list(set(all_terms[key]))
-    all_warnings = list(set(all_warnings))
+    # Build emergency summary as one flat list of lines, joined once at the end
+    lines = []
     
-    # Build emergency summary
-    summary_parts = []
+    def add_section(title: str, body: List[str]):
+        if lines:
+            lines.append("")
+        lines.append(f"=== {title} ===")
+        lines.extend(body)
     
     if emergency_mode:
         # CRITICAL ALERTS
@@ -252,19 +307,19 @@ def generate_emergency_summary(patient_history: str, emergency_mode: bool = True
         
         # Emergency warnings
         if risk_categories['critical'] or risk_categories['high']:
-            critical_conditions = []
+            critical_conditions = set()
             for record in risk_categories['critical'] + risk_categories['high']:
                 if record.get('disease'):
-                    critical_conditions.append(record['disease'])
+                    critical_conditions.add(record['disease'])
             if critical_conditions:
-                critical_section.append(f"High-Risk Conditions: {', '.join(list(set(critical_conditions))[:5])}")
+                critical_section.append(f"High-Risk Conditions: {', '.join(list(critical_conditions)[:5])}")
         
         # Explicit warnings
         if all_warnings:
             critical_section.append(f"Clinical Warnings: {'; '.join(all_warnings[:3])}")
         
         if critical_section:
-            summary_parts.append("=== CRITICAL ALERTS ===\n" + "\n".join(critical_section))
+            add_section("CRITICAL ALERTS", critical_section)
         
         # RECENT HISTORY
         recent_section = []
@@ -277,13 +332,13 @@ def generate_emergency_summary(patient_history: str, emergency_mode: bool = True
             recent_section.append(f"Last 30 Days: {', '.join(recent_conditions)}")
         
         if recent_section:
-            summary_parts.append("=== RECENT HISTORY ===\n" + "\n".join(recent_section))
+            add_section("RECENT HISTORY", recent_section)
     
     # MEDICAL PROFILE
     profile_section = []
     
     # Primary diagnoses
-    unique_diseases = list(set([r.get('disease', '') for r in records if r.get('disease')]))
+    unique_diseases = list({r['disease'] for r in records if r.get('disease')})
     if unique_diseases:
         profile_section.append(f"Diagnosed Conditions: {', '.join(unique_diseases[:5])}")
     
@@ -292,29 +347,29 @@ def generate_emergency_summary(patient_history: str, emergency_mode: bool = True
         profile_section.append(f"Recurring Conditions: {', '.join(patterns['recurring_conditions'][:3])}")
     
     # Treatment history
-    unique_treatments = list(set(all_terms['treatments']))
+    unique_treatments = list(all_terms['treatments'])
     if unique_treatments:
         profile_section.append(f"Treatment History: {', '.join(unique_treatments[:5])}")
     
     if profile_section:
-        summary_parts.append("=== MEDICAL PROFILE ===\n" + "\n".join(profile_section))
+        add_section("MEDICAL PROFILE", profile_section)
     
     # CLINICAL CONSIDERATIONS (Emergency mode only)
     if emergency_mode:
         clinical_section = []
         
         # Warning keywords from all records
-        warning_keywords = list(set(all_terms['warnings']))
+        warning_keywords = list(all_terms['warnings'])
         if warning_keywords:
             clinical_section.append(f"Attention Required: {', '.join(warning_keywords[:5])}")
         
         # Symptoms to monitor
-        symptoms = list(set(all_terms['symptoms']))
+        symptoms = list(all_terms['symptoms'])
         if symptoms:
             clinical_section.append(f"Reported Symptoms: {', '.join(symptoms[:5])}")
         
         if clinical_section:
-            summary_parts.append("=== CLINICAL CONSIDERATIONS ===\n" + "\n".join(clinical_section))
+            add_section("CLINICAL CONSIDERATIONS", clinical_section)
     
     # QUICK INSIGHTS
     insights_section = []
@@ -335,26 +390,48 @@ def generate_emergency_summary(patient_history: str, emergency_mode: bool = True
     insights_section.append(f"Total Records: {patterns['total_visits']} visits, {patterns['unique_conditions']} unique conditions")
     
     if insights_section:
-        summary_parts.append("=== QUICK INSIGHTS ===\n" + "\n".join(insights_section))
+        add_section("QUICK INSIGHTS", insights_section)
     
-    return "\n\n".join(summary_parts)
+    return "\n".join(lines)
+
+def process_request(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the JSON response for a single summarization request."""
+    patient_history = input_data.get('history', '')
+    emergency_mode = input_data.get('emergencyMode', True)
+    
+    if not patient_history:
+        return {"error": "No patient history provided"}
+    return {"summary": generate_emergency_summary(patient_history, emergency_mode)}
+
+def serve():
+    """Answer newline-delimited JSON requests until stdin closes.
+
+    Lets the server keep one worker alive instead of paying interpreter
+    startup and pattern compilation for every request.
+    """
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        try:
+            result = process_request(loads(line))
+        except Exception as e:
+            result = {"error": f"Processing failed: {str(e)}"}
+        sys.stdout.buffer.write(dumps(result) + b"\n")
+        sys.stdout.buffer.flush()
 
 def main():
     """Main function to process patient history from stdin."""
+    if '--serve' in sys.argv[1:]:
+        serve()
+        return
+    
     try:
         # Read input from stdin (JSON format)
-        input_data = json.load(sys.stdin)
-        patient_history = input_data.get('history', '')
-        emergency_mode = input_data.get('emergencyMode', True)
-        
-        if not patient_history:
-            result = {"error": "No patient history provided"}
-        else:
-            summary = generate_emergency_summary(patient_history, emergency_mode)
-            result = {"summary": summary}
+        input_data = loads(sys.stdin.buffer.read())
+        result = process_request(input_data)
         
         # Output result as JSON
-        print(json.dumps(result))
+        sys.stdout.buffer.write(dumps(result) + b"\n")
     
     except Exception as e:
         error_result = {"error": f"Processing failed: {str(e)}"}
@@ -0,0 +1,34 @@
+"""
+JSON encoding for the Python scripts the server talks to over stdin/stdout.
+Uses orjson when it is installed and the standard library json otherwise.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # fall back to the standard library json module
+    orjson = None
+
+def loads(data: bytes) -> Any:
+    """Decode JSON, using orjson when it is installed."""
+    if orjson:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects escaped lone surrogates (e.g. "\ud83d" from a
+            # truncated emoji in JSON.stringify output); json accepts them
+            pass
+    return json.loads(data)
+
+def dumps(obj: Any) -> bytes:
+    """Encode JSON, using orjson when it is installed."""
+    if orjson:
+        try:
+            return orjson.dumps(obj)
+        except orjson.JSONEncodeError:
+            # Strings holding lone surrogates are not valid UTF-8; json
+            # writes them as \u escapes
+            pass
+    return json.dumps(obj).encode()
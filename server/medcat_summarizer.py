@@ -7,6 +7,8 @@ Uses MEDCAT for medical entity extraction and summarization.
 import sys
 import json
 import os
+import re
+from functools import lru_cache
 from typing import Dict, List, Any
 import spacy
 from medcat.cat import CAT
@@ -14,12 +16,26 @@ from medcat.vocab import Vocab
 from medcat.cdb import CDB
 # from medcat.meta_cat import MetaCAT  # Not available in this version
 
+from json_io import loads, dumps
+
+# Only doc.ents is read, so skip the components NER does not depend on
+SPACY_DISABLED_PIPES = ["tagger", "parser", "attribute_ruler", "lemmatizer"]
+
+# Risk keywords as whole-word patterns, checked from most to least severe.
+# Records matching none of them fall through to 'low'.
+_RISK_LEVEL_RES = [
+    ('critical', re.compile(r'\b(?:critical|emergency|life-threatening|severe)\b', re.IGNORECASE)),
+    ('high', re.compile(r'\b(?:high risk|serious|urgent)\b', re.IGNORECASE)),
+    ('medium', re.compile(r'\b(?:medium|moderate)\b', re.IGNORECASE)),
+]
+
+@lru_cache(maxsize=1)
 def load_medcat_model():
-    """Load MEDCAT model. In production, use proper model paths."""
+    """Load MEDCAT model once per process. In production, use proper model paths."""
     try:
         # For demo purposes, we'll use a basic spaCy model
         # In production, you'd load proper MEDCAT models
-        nlp = spacy.load("en_core_web_sm")
+        nlp = spacy.load("en_core_web_sm", disable=SPACY_DISABLED_PIPES)
 
         # Mock MEDCAT components for demonstration
         vocab = Vocab()
@@ -30,37 +46,41 @@ def load_medcat_model():
     except Exception as e:
         print(f"Warning: Could not load MEDCAT model: {e}", file=sys.stderr)
         # Fallback to basic spaCy
-        nlp = spacy.load("en_core_web_sm")
+        nlp = spacy.load("en_core_web_sm", disable=SPACY_DISABLED_PIPES)
         return None, nlp
 
+def _medcat_entities(text: str, cat) -> List[Dict[str, Any]]:
+    """Extract entities with MEDCAT, returning none if extraction fails."""
+    try:
+        cat_doc = cat(text)
+    except Exception as e:
+        print(f"MEDCAT extraction failed: {e}", file=sys.stderr)
+        return []
+    return [{
+        'text': ent.text,
+        'label': ent.label_,
+        'start': ent.start_char,
+        'end': ent.end_char,
+        'confidence': getattr(ent, 'confidence', 0.8)
+    } for ent in cat_doc.ents if hasattr(ent, 'label_')]
+
+def _spacy_entities(doc) -> List[Dict[str, Any]]:
+    """Basic entity extraction from a processed spaCy doc."""
+    return [{
+        'text': ent.text,
+        'label': ent.label_,
+        'start': ent.start_char,
+        'end': ent.end_char,
+        'confidence': 0.5
+    } for ent in doc.ents]
+
 def extract_medical_entities(text: str, cat, nlp) -> Dict[str, Any]:
     """Extract medical entities using MEDCAT or fallback to spaCy."""
-    entities = []
-
-    if cat:
-        # Use MEDCAT for entity extraction
-        try:
-            doc = cat(text)
-            entities = [{
-                'text': ent.text,
-                'label': ent.label_,
-                'start': ent.start_char,
-                'end': ent.end_char,
-                'confidence': getattr(ent, 'confidence', 0.8)
-            } for ent in doc.ents if hasattr(ent, 'label_')]
-        except Exception as e:
-            print(f"MEDCAT extraction failed: {e}", file=sys.stderr)
+    entities = _medcat_entities(text, cat) if cat else []
 
     # Fallback to basic entity extraction
     if not entities:
-        doc = nlp(text)
-        entities = [{
-            'text': ent.text,
-            'label': ent.label_,
-            'start': ent.start_char,
-            'end': ent.end_char,
-            'confidence': 0.5
-        } for ent in doc.ents]
+        entities = _spacy_entities(nlp(text))
 
     return {
         'entities': entities,
@@ -76,19 +96,11 @@ def categorize_by_risk_level(records: List[str]) -> Dict[str, List[str]]:
         'low': []
     }
 
-    risk_keywords = {
-        'critical': ['critical', 'emergency', 'life-threatening', 'severe'],
-        'high': ['high risk', 'serious', 'urgent'],
-        'medium': ['medium', 'moderate'],
-        'low': ['low', 'mild', 'stable']
-    }
-
     for record in records:
-        record_lower = record.lower()
         risk_found = 'low'  # default
 
-        for risk_level, keywords in risk_keywords.items():
-            if any(keyword in record_lower for keyword in keywords):
+        for risk_level, pattern in _RISK_LEVEL_RES:
+            if pattern.search(record):
                 risk_found = risk_level
                 break
 
@@ -107,11 +119,14 @@ def generate_medcat_summary(patient_history: str) -> str:
 
     cat, nlp = load_medcat_model()
 
-    # Extract entities from all records
-    all_entities = []
-    for record in records:
-        entities = extract_medical_entities(record, cat, nlp)
-        all_entities.extend(entities['entities'])
+    # Extract entities from all records with MEDCAT; only the records it
+    # finds nothing in are batched through the spaCy pipeline
+    record_entities = [_medcat_entities(record, cat) if cat else [] for record in records]
+    fallback = [i for i, entities in enumerate(record_entities) if not entities]
+    docs = nlp.pipe((records[i] for i in fallback), batch_size=32)
+    for i, doc in zip(fallback, docs):
+        record_entities[i] = _spacy_entities(doc)
+    all_entities = [ent for entities in record_entities for ent in entities]
 
     # Categorize records by risk
     risk_categories = categorize_by_risk_level(records)
@@ -155,21 +170,42 @@ def generate_medcat_summary(patient_history: str) -> str:
 
     return "\n\n".join(summary_parts)
 
+def process_request(input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Build the JSON response for a single summarization request."""
+    patient_history = input_data.get('history', '')
+
+    if not patient_history:
+        return {"error": "No patient history provided"}
+    return {"summary": generate_medcat_summary(patient_history)}
+
+def serve():
+    """Answer newline-delimited JSON requests until stdin closes.
+
+    Keeps the process (and the loaded model) alive across requests.
+    """
+    for line in sys.stdin.buffer:
+        if not line.strip():
+            continue
+        try:
+            result = process_request(loads(line))
+        except Exception as e:
+            result = {"error": f"Processing failed: {str(e)}"}
+        sys.stdout.buffer.write(dumps(result) + b"\n")
+        sys.stdout.buffer.flush()
+
 def main():
     """Main function to process patient history from stdin."""
+    if '--serve' in sys.argv[1:]:
+        serve()
+        return
+
     try:
         # Read input from stdin (JSON format)
-        input_data = json.load(sys.stdin)
-        patient_history = input_data.get('history', '')
-
-        if not patient_history:
-            result = {"error": "No patient history provided"}
-        else:
-            summary = generate_medcat_summary(patient_history)
-            result = {"summary": summary}
+        input_data = loads(sys.stdin.buffer.read())
+        result = process_request(input_data)
 
         # Output result as JSON
-        print(json.dumps(result))
+        sys.stdout.buffer.write(dumps(result) + b"\n")
 
     except Exception as e:
         error_result = {"error": f"Processing failed: {str(e)}"}
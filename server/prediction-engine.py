@@ -6,9 +6,60 @@ Analyzes patient medical history to predict disease risks and health trends.
 
 import sys
 import json
-from typing import Dict, List, Any
+import heapq
+from bisect import bisect_right
+import re
+from typing import Dict, FrozenSet, List, Any
 from datetime import datetime, timedelta
 from collections import Counter
+from functools import lru_cache
+
+from json_io import loads, dumps
+
+# Numeric severity of each risk level
+RISK_ORDER = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+
+# Risk score (0-100) lower bounds for each level above 'low'
+RISK_LEVEL_EDGES = (25, 50, 75)
+RISK_LEVELS = ('low', 'medium', 'high', 'critical')
+
+# Conditions scored by analyze_medical_history
+CONDITIONS = ('Type 2 Diabetes', 'Hypertension', 'Heart Disease', 'Stroke', 'Kidney Disease')
+
+# Keyword indicators for each condition group, matched as substrings of the
+# lowercased disease name. Substrings, not whole words: "kidneys" and
+# "insulin-dependent" must still count, so the groups are not reduced to
+# word-set intersections.
+CONDITION_INDICATORS = {
+    'diabetes': ('diabetes', 'blood sugar', 'glucose', 'insulin'),
+    'hypertension': ('hypertension', 'blood pressure', 'bp'),
+    'heart': ('heart', 'cardiac', 'coronary', 'chest pain'),
+    'kidney': ('kidney', 'renal', 'creatinine'),
+    'metabolic': ('diabetes', 'obesity', 'metabolic syndrome', 'cholesterol'),
+    'cardiovascular': ('hypertension', 'heart disease', 'coronary', 'cardiac'),
+    'respiratory': ('asthma', 'copd', 'bronchitis', 'pneumonia'),
+}
+
+# Every group an indicator hit implies, including groups of indicators it
+# contains (a "heart disease" hit is also a "heart" hit)
+_INDICATOR_GROUPS = {
+    indicator: frozenset(group for group, indicators in CONDITION_INDICATORS.items()
+                         if any(other in indicator for other in indicators))
+    for indicators in CONDITION_INDICATORS.values() for indicator in indicators
+}
+
+# One scan finds all indicators: the zero-width lookahead is tried at every
+# position, longest indicator first, so overlapping hits are not skipped
+_INDICATOR_RE = re.compile('(?=(%s))' % '|'.join(
+    map(re.escape, sorted(_INDICATOR_GROUPS, key=len, reverse=True))))
+
+@lru_cache(maxsize=1024)
+def condition_groups(disease: str) -> FrozenSet[str]:
+    """Return the condition groups whose indicators occur in a lowercased disease name."""
+    groups = frozenset()
+    for match in _INDICATOR_RE.finditer(disease):
+        groups |= _INDICATOR_GROUPS[match.group(1)]
+    return groups
 
 def calculate_age_risk(age: int) -> float:
     """Calculate age-based risk factor (0-1)."""
@@ -23,12 +74,8 @@ def calculate_age_risk(age: int) -> float:
     else:
         return 0.8
 
-def analyze_medical_history(records: List[Dict]) -> Dict[str, float]:
-    """Analyze medical history for risk factors."""
-    if not records:
-        return {}
-    
-    # Count conditions by severity
+def scan_records(records: List[Dict]) -> Dict[str, Any]:
+    """Collect the counts the history analyzers need in one pass over the records."""
     risk_counts = {'critical': 0, 'high': 0, 'medium': 0, 'low': 0}
     disease_counts = Counter()
     
@@ -41,22 +88,45 @@ def analyze_medical_history(records: List[Dict]) -> Dict[str, float]:
         if disease:
             disease_counts[disease] += 1
     
+    # Lowercase and classify each distinct disease once (names differing only
+    # in case share a cached classification); group_counts counts distinct
+    # diseases per group, related_counts counts records per group
+    group_counts = Counter()
+    related_counts = Counter()
+    for disease, count in disease_counts.items():
+        for group in condition_groups(disease.lower()):
+            group_counts[group] += 1
+            related_counts[group] += count
+    
+    return {
+        'record_count': len(records),
+        'risk_counts': risk_counts,
+        'disease_counts': disease_counts,
+        'group_counts': group_counts,
+        'related_counts': related_counts
+    }
+
+def analyze_medical_history(scan: Dict[str, Any]) -> Dict[str, float]:
+    """Analyze medical history for risk factors."""
+    if not scan['record_count']:
+        return {}
+    
+    risk_counts = scan['risk_counts']
+    group_counts = scan['group_counts']
+    
     # Calculate risk scores for specific conditions
     condition_risks = {}
     
     # Diabetes risk
-    diabetes_indicators = ['diabetes', 'blood sugar', 'glucose', 'insulin']
-    diabetes_count = sum(1 for d in disease_counts if any(ind in d.lower() for ind in diabetes_indicators))
+    diabetes_count = group_counts['diabetes']
     condition_risks['Type 2 Diabetes'] = min(diabetes_count * 0.3, 1.0)
     
     # Hypertension risk
-    hypertension_indicators = ['hypertension', 'blood pressure', 'bp']
-    hypertension_count = sum(1 for d in disease_counts if any(ind in d.lower() for ind in hypertension_indicators))
+    hypertension_count = group_counts['hypertension']
     condition_risks['Hypertension'] = min(hypertension_count * 0.3, 1.0)
     
     # Heart disease risk
-    heart_indicators = ['heart', 'cardiac', 'coronary', 'chest pain']
-    heart_count = sum(1 for d in disease_counts if any(ind in d.lower() for ind in heart_indicators))
+    heart_count = group_counts['heart']
     condition_risks['Heart Disease'] = min(heart_count * 0.25 + (risk_counts['high'] + risk_counts['critical']) * 0.1, 1.0)
     
     # Stroke risk (based on hypertension and diabetes)
@@ -66,59 +136,40 @@ def analyze_medical_history(records: List[Dict]) -> Dict[str, float]:
     condition_risks['Stroke'] = min(stroke_risk, 1.0)
     
     # Kidney disease risk
-    kidney_indicators = ['kidney', 'renal', 'creatinine']
-    kidney_count = sum(1 for d in disease_counts if any(ind in d.lower() for ind in kidney_indicators))
+    kidney_count = group_counts['kidney']
     kidney_risk = kidney_count * 0.2 + condition_risks.get('Hypertension', 0) * 0.3 + condition_risks.get('Type 2 Diabetes', 0) * 0.3
     condition_risks['Kidney Disease'] = min(kidney_risk, 1.0)
     
     return condition_risks
 
-def analyze_risk_progression(records: List[Dict]) -> float:
-    """Analyze if risk levels are increasing over time."""
-    if len(records) < 2:
+def analyze_risk_progression(recent_records: List[Dict]) -> float:
+    """Analyze if risk levels are increasing over time.
+
+    Expects the most recent records (at most ten), newest first.
+    """
+    if len(recent_records) < 2:
         return 0.0
     
-    # Sort by date
-    sorted_records = sorted(records, key=lambda x: x.get('date', ''), reverse=True)
-    
-    risk_order = {'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
-    risk_values = [risk_order.get(r.get('risk', 'low').lower(), 1) for r in sorted_records[:10]]
-    
-    if len(risk_values) < 2:
-        return 0.0
+    risk_values = [RISK_ORDER.get(r.get('risk', 'low').lower(), 1) for r in recent_records]
     
     # Calculate trend
-    recent_avg = sum(risk_values[:3]) / min(3, len(risk_values[:3]))
-    older_avg = sum(risk_values[3:]) / max(1, len(risk_values[3:]))
+    recent, older = risk_values[:3], risk_values[3:]
+    recent_avg = sum(recent) / len(recent)
+    older_avg = sum(older) / max(1, len(older))
     
     progression = (recent_avg - older_avg) / 4.0  # Normalize to 0-1
     return max(0, min(progression, 1.0))
 
-def identify_recurring_patterns(records: List[Dict]) -> Dict[str, int]:
+def identify_recurring_patterns(disease_counts: Counter) -> Dict[str, int]:
     """Identify recurring conditions."""
-    disease_counts = Counter()
-    
-    for record in records:
-        disease = record.get('disease', '')
-        if disease:
-            disease_counts[disease] += 1
-    
     # Return only conditions that appear more than once
     return {disease: count for disease, count in disease_counts.items() if count > 1}
 
-def check_related_conditions(records: List[Dict]) -> float:
+def check_related_conditions(related_counts: Counter) -> float:
     """Check for comorbidities and related conditions."""
-    diseases = [r.get('disease', '').lower() for r in records if r.get('disease')]
-    
-    # Define related condition groups
-    metabolic_conditions = ['diabetes', 'obesity', 'metabolic syndrome', 'cholesterol']
-    cardiovascular_conditions = ['hypertension', 'heart disease', 'coronary', 'cardiac']
-    respiratory_conditions = ['asthma', 'copd', 'bronchitis', 'pneumonia']
-    
-    # Count conditions in each group
-    metabolic_count = sum(1 for d in diseases if any(cond in d for cond in metabolic_conditions))
-    cardiovascular_count = sum(1 for d in diseases if any(cond in d for cond in cardiovascular_conditions))
-    respiratory_count = sum(1 for d in diseases if any(cond in d for cond in respiratory_conditions))
+    metabolic_count = related_counts['metabolic']
+    cardiovascular_count = related_counts['cardiovascular']
+    respiratory_count = related_counts['respiratory']
     
     # Higher score if multiple related conditions exist
     comorbidity_score = 0
@@ -138,35 +189,45 @@ def calculate_disease_risk(patient_data: Dict) -> Dict[str, Any]:
     age = patient_data.get('age', 30)
     records = patient_data.get('records', [])
     
+    # A patient without records has no history-based risks to score
+    if not records:
+        return {'predictions': [], 'overallHealthScore': 85, 'trendDirection': 'stable'}
+    
     # Calculate individual risk factors
+    scan = scan_records(records)
+    # Ten newest records without sorting the whole history (same order,
+    # ties included, as sorted(..., reverse=True)[:10])
+    recent_records = heapq.nlargest(10, records, key=lambda x: x.get('date', ''))
     age_risk = calculate_age_risk(age)
-    history_risks = analyze_medical_history(records)
-    progression_risk = analyze_risk_progression(records)
-    recurring = identify_recurring_patterns(records)
-    comorbidity_risk = check_related_conditions(records)
+    history_risks = analyze_medical_history(scan)
+    progression_risk = analyze_risk_progression(recent_records)
+    recurring = identify_recurring_patterns(scan['disease_counts'])
+    comorbidity_risk = check_related_conditions(scan['related_counts'])
+    
+    # Terms shared by every condition; the per-condition sum below keeps the
+    # original order of additions so scores are unchanged
+    age_term = age_risk * 0.15
+    progression_term = progression_risk * 0.25
+    comorbidity_term = comorbidity_risk * 0.10
+    confidence = min(0.7 + (len(records) * 0.03), 0.95)  # More records = higher confidence
     
     # Generate predictions for each condition
     predictions = []
     
     for condition, history_score in history_risks.items():
+        is_recurring = condition in recurring
+        
         # Weighted risk calculation
         risk_score = (
-            age_risk * 0.15 +
+            age_term +
             history_score * 0.35 +
-            progression_risk * 0.25 +
-            (0.15 if condition in recurring else 0) +
-            comorbidity_risk * 0.10
+            progression_term +
+            (0.15 if is_recurring else 0) +
+            comorbidity_term
         ) * 100  # Convert to 0-100 scale
         
         # Determine risk level
-        if risk_score >= 75:
-            risk_level = 'critical'
-        elif risk_score >= 50:
-            risk_level = 'high'
-        elif risk_score >= 25:
-            risk_level = 'medium'
-        else:
-            risk_level = 'low'
+        risk_level = RISK_LEVELS[bisect_right(RISK_LEVEL_EDGES, risk_score)]
         
         # Generate factors
         factors = []
@@ -176,19 +237,19 @@ def calculate_disease_risk(patient_data: Dict) -> Dict[str, Any]:
             factors.append("Existing medical history")
         if progression_risk > 0.3:
             factors.append("Increasing risk trend")
-        if condition in recurring:
+        if is_recurring:
             factors.append("Recurring condition")
         if comorbidity_risk > 0.2:
             factors.append("Related health conditions present")
         
         # Generate recommendations
-        recommendations = generate_recommendations(condition, risk_level, factors)
+        recommendations = generate_recommendations(condition, risk_level)
         
         predictions.append({
             'condition': condition,
             'riskScore': round(risk_score, 1),
             'riskLevel': risk_level,
-            'confidence': min(0.7 + (len(records) * 0.03), 0.95),  # More records = higher confidence
+            'confidence': confidence,
             'factors': factors,
             'recommendations': recommendations
         })
@@ -214,7 +275,7 @@ def calculate_disease_risk(patient_data: Dict) -> Dict[str, Any]:
         'trendDirection': trend
     }
 
-def generate_recommendations(condition: str, risk_level: str, factors: List[str]) -> List[str]:
+def _build_recommendations(condition: str, risk_level: str) -> List[str]:
     """Generate personalized recommendations based on condition and risk."""
     recommendations = []
     
@@ -259,11 +320,25 @@ def generate_recommendations(condition: str, risk_level: str, factors: List[str]
     
     return recommendations[:5]  # Limit to top 5 recommendations
 
+# Recommendations depend only on the condition and risk level, so every
+# combination is built once at import
+_RECS = {
+    (condition, risk_level): tuple(_build_recommendations(condition, risk_level))
+    for condition in CONDITIONS for risk_level in RISK_LEVELS
+}
+
+def generate_recommendations(condition: str, risk_level: str) -> List[str]:
+    """Return the recommendations for a condition at a given risk level."""
+    recs = _RECS.get((condition, risk_level))
+    if recs is None:
+        return _build_recommendations(condition, risk_level)
+    return list(recs)
+
 def main():
     """Main function to process patient data and generate predictions."""
     try:
         # Read input from stdin
-        input_data = json.load(sys.stdin)
+        input_data = loads(sys.stdin.buffer.read())
         patient_data = input_data.get('patientData', {})
         
         if not patient_data:
@@ -276,7 +351,7 @@ def main():
             }
         
         # Output result as JSON
-        print(json.dumps(result))
+        sys.stdout.buffer.write(dumps(result) + b"\n")
     
     except Exception as e:
         error_result = {"error": f"Prediction failed: {str(e)}"}
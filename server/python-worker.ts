@@ -0,0 +1,133 @@
+import { spawn, type ChildProcessWithoutNullStreams } from "child_process";
+import { createInterface } from "readline";
+
+type PendingRequest = {
+  line: string;
+  resolve: (result: any) => void;
+  reject: (error: Error) => void;
+  timer?: ReturnType<typeof setTimeout>;
+};
+
+type WorkerProcess = {
+  child: ChildProcessWithoutNullStreams;
+  // Requests written to this child and not yet answered, oldest first
+  pending: PendingRequest[];
+  send: (request: PendingRequest) => void;
+};
+
+// Small pool of long-lived Python scripts answering newline-delimited JSON
+// requests. Each child is started with --serve on first use and restarted
+// on a later request if it exits, so interpreter startup is paid once per
+// child, not per request. A child answers its requests one at a time and in
+// order, so its pending requests form a FIFO queue; the queue belongs to
+// that child alone, so a dead child can never reject or answer requests
+// sent to its replacement.
+export class PythonWorker {
+  private workers: (WorkerProcess | null)[];
+
+  constructor(
+    private readonly script: string,
+    poolSize = 4,
+    private readonly timeoutMs = 30000
+  ) {
+    this.workers = new Array(poolSize).fill(null);
+  }
+
+  request(payload: unknown): Promise<any> {
+    return new Promise((resolve, reject) => {
+      this.dispatch({ line: JSON.stringify(payload) + "\n", resolve, reject });
+    });
+  }
+
+  // Send a request to the child with the shortest queue, starting one if
+  // that slot is empty; idle running children are preferred over new ones
+  private dispatch(request: PendingRequest) {
+    let slot = 0;
+    for (let i = 1; i < this.workers.length; i++) {
+      if ((this.workers[i]?.pending.length ?? 0) < (this.workers[slot]?.pending.length ?? 0)) {
+        slot = i;
+      }
+    }
+    (this.workers[slot] ?? this.start(slot)).send(request);
+  }
+
+  private start(slot: number): WorkerProcess {
+    const child = spawn("python", [this.script, "--serve"], {
+      stdio: ["pipe", "pipe", "pipe"]
+    });
+    const pending: PendingRequest[] = [];
+    const isCurrent = () => this.workers[slot]?.child === child;
+
+    const stop = () => {
+      if (isCurrent()) {
+        this.workers[slot] = null;
+      }
+      child.kill();
+    };
+
+    // Only the request at the head of the queue is being worked on, so its
+    // timer starts when it gets there, not while it waits behind others
+    const startHeadTimer = () => {
+      const head = pending[0];
+      if (head) {
+        head.timer = setTimeout(timeout, this.timeoutMs);
+      }
+    };
+
+    // A hung request fails alone: the child is killed and the requests
+    // queued behind it are sent to the rest of the pool
+    const timeout = () => {
+      stop();
+      const [hung, ...queued] = pending.splice(0);
+      hung.reject(new Error(`${this.script} timed out after ${this.timeoutMs}ms`));
+      for (const request of queued) {
+        this.dispatch(request);
+      }
+    };
+
+    const fail = (error: Error) => {
+      stop();
+      for (const request of pending.splice(0)) {
+        clearTimeout(request.timer);
+        request.reject(error);
+      }
+    };
+
+    createInterface({ input: child.stdout }).on("line", (line) => {
+      if (!isCurrent()) {
+        return;
+      }
+      const next = pending.shift();
+      if (!next) {
+        return;
+      }
+      clearTimeout(next.timer);
+      startHeadTimer();
+      try {
+        next.resolve(JSON.parse(line));
+      } catch (parseError: any) {
+        next.reject(parseError);
+      }
+    });
+
+    child.stderr.on("data", (data) => {
+      console.error(`${this.script}:`, data.toString());
+    });
+
+    child.on("error", fail);
+    child.stdin.on("error", fail);
+    child.on("close", (code) => fail(new Error(`${this.script} exited with code ${code}`)));
+
+    const send = (request: PendingRequest) => {
+      pending.push(request);
+      if (pending.length === 1) {
+        startHeadTimer();
+      }
+      child.stdin.write(request.line);
+    };
+
+    const worker = { child, pending, send };
+    this.workers[slot] = worker;
+    return worker;
+  }
+}
@@ -1,11 +1,13 @@
 import type { Express } from "express";
 import { createServer, type Server } from "http";
 import { storage } from "./storage";
-import { spawn } from "child_process";
+import { PythonWorker } from "./python-worker";
 import bcrypt from "bcryptjs";
 import { insertUserSchema, insertHealthRecordSchema, insertDoctorNoteSchema } from "@shared/schema";
 import { registerPredictionRoutes, registerLabRoutes } from "./prediction-lab-routes";
 
+const emergencySummarizer = new PythonWorker("server/emergency_summarizer.py");
+
 export async function registerRoutes(app: Express): Promise<Server> {
   // Authentication routes
   app.post("/api/auth/register", async (req, res) => {
@@ -344,50 +346,26 @@ ${record.emergencyWarnings ? `Warnings: ${record.emergencyWarnings}` : ""}
 ---`;
       }).join("\n\n");
 
-      // Use emergency summarizer via Python subprocess
-      const pythonProcess = spawn('python', ['server/emergency_summarizer.py'], {
-        stdio: ['pipe', 'pipe', 'pipe']
-      });
-
-      const inputData = JSON.stringify({
-        history: historyText,
-        emergencyMode: emergencyMode
-      });
-      let output = '';
-      let errorOutput = '';
-
-      pythonProcess.stdin.write(inputData);
-      pythonProcess.stdin.end();
-
-      pythonProcess.stdout.on('data', (data) => {
-        output += data.toString();
-      });
+      // Use the long-running emergency summarizer worker
+      let result: any;
+      try {
+        result = await emergencySummarizer.request({
+          history: historyText,
+          emergencyMode: emergencyMode
+        });
+      } catch (workerError) {
+        console.error('Python process error:', workerError);
+        return res.status(500).json({ message: "Failed to generate summary" });
+      }
 
-      pythonProcess.stderr.on('data', (data) => {
-        errorOutput += data.toString();
-      });
+      if (result.error) {
+        console.error('Summarizer error:', result.error);
+        return res.status(500).json({ message: "Failed to generate summary" });
+      }
 
-      pythonProcess.on('close', (code) => {
-        try {
-          if (code !== 0) {
-            console.error('Python process error:', errorOutput);
-            return res.status(500).json({ message: "Failed to generate summary" });
-          }
-
-          const result = JSON.parse(output.trim());
-          if (result.error) {
-            console.error('Summarizer error:', result.error);
-            return res.status(500).json({ message: "Failed to generate summary" });
-          }
-
-          res.json({
-            summary: result.summary,
-            emergencyMode: emergencyMode
-          });
-        } catch (parseError) {
-          console.error('Parse error:', parseError);
-          res.status(500).json({ message: "Failed to generate summary" });
-        }
+      res.json({
+        summary: result.summary,
+        emergencyMode: emergencyMode
       });
 
     } catch (error: any) {
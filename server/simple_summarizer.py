@@ -7,41 +7,68 @@ Provides basic but effective summarization of patient medical histories.
 import sys
 import json
 import re
-from typing import Dict, List, Any
+from types import MappingProxyType
+from typing import Dict, List, Any, Mapping, Pattern, Tuple
 from collections import Counter
-
-def extract_medical_terms(text: str) -> Dict[str, List[str]]:
-    """Extract basic medical terms using regex patterns."""
-    # Common medical keywords and patterns
-    disease_patterns = [
-        r'\b(?:acute|chronic|severe|mild|primary|secondary)\s+\w+\b',
-        r'\b(?:bronchitis|pneumonia|hypertension|diabetes|asthma|cancer|tumor)\b',
-        r'\b(?:infection|inflammation|fracture|disorder|syndrome)\b'
-    ]
-
-    treatment_patterns = [
-        r'\b(?:prescribed|administered|given)\s+\w+\b',
-        r'\b(?:antibiotics|medication|therapy|surgery|procedure)\b',
-        r'\b(?:treatment|medication|drug|pill|injection)\b'
-    ]
-
-    symptom_patterns = [
-        r'\b(?:cough|fever|pain|nausea|headache|dizziness)\b',
-        r'\b(?:shortness of breath|chest pain|fatigue|weakness)\b',
-        r'\b(?:presented with|complaining of|suffering from)\b'
-    ]
-
-    def find_matches(patterns: List[str], text: str) -> List[str]:
-        matches = []
+from functools import lru_cache
+
+from json_io import loads, dumps
+
+def _compile_patterns(*patterns: str) -> Tuple[Pattern, ...]:
+    """Compile a category's patterns once, case-insensitively."""
+    return tuple(re.compile(p, re.IGNORECASE) for p in patterns)
+
+# Common medical keywords and patterns, compiled once at import
+_DISEASE_PATTERNS = _compile_patterns(
+    r'\b(?:acute|chronic|severe|mild|primary|secondary)\s+\w+\b',
+    r'\b(?:bronchitis|pneumonia|hypertension|diabetes|asthma|cancer|tumor)\b',
+    r'\b(?:infection|inflammation|fracture|disorder|syndrome)\b'
+)
+
+_TREATMENT_PATTERNS = _compile_patterns(
+    r'\b(?:prescribed|administered|given)\s+\w+\b',
+    r'\b(?:antibiotics|medication|therapy|surgery|procedure)\b',
+    r'\b(?:treatment|medication|drug|pill|injection)\b'
+)
+
+_SYMPTOM_PATTERNS = _compile_patterns(
+    r'\b(?:cough|fever|pain|nausea|headache|dizziness)\b',
+    r'\b(?:shortness of breath|chest pain|fatigue|weakness)\b',
+    r'\b(?:presented with|complaining of|suffering from)\b'
+)
+
+# Record separator together with the whitespace around it, so the split
+# pieces come out already stripped
+_RECORD_SPLIT = re.compile(r'\s*---\s*')
+
+@lru_cache(maxsize=512)
+def extract_medical_terms(text: str) -> Mapping[str, Tuple[str, ...]]:
+    """Extract basic medical terms using regex patterns.
+
+    Results are cached per record text, since histories often repeat the
+    same record, and returned as a read-only mapping of tuples.
+    """
+    def find_matches(patterns: Tuple[Pattern, ...], text: str) -> Tuple[str, ...]:
+        matches = set()
         for pattern in patterns:
-            matches.extend(re.findall(pattern, text, re.IGNORECASE))
-        return list(set(matches))  # Remove duplicates
-
-    return {
-        'diseases': find_matches(disease_patterns, text),
-        'treatments': find_matches(treatment_patterns, text),
-        'symptoms': find_matches(symptom_patterns, text)
-    }
+            matches.update(pattern.findall(text))
+        return tuple(matches)  # Remove duplicates
+
+    return MappingProxyType({
+        'diseases': find_matches(_DISEASE_PATTERNS, text),
+        'treatments': find_matches(_TREATMENT_PATTERNS, text),
+        'symptoms': find_matches(_SYMPTOM_PATTERNS, text)
+    })
+
+# Risk keywords by level, highest first; the first level with a keyword in
+# the record wins. Keywords match as substrings ("severely" counts as
+# severe). Records matching no level default to 'low', so its keywords
+# ('low', 'mild', 'routine') need no rule of their own.
+_RISK_RULES = (
+    ('critical', ('critical', 'emergency', 'life-threatening', 'severe', 'intensive care')),
+    ('high', ('high risk', 'serious', 'urgent', 'unstable')),
+    ('medium', ('medium', 'moderate', 'stable')),
+)
 
 def categorize_by_risk_level(records: List[str]) -> Dict[str, List[str]]:
     """Categorize records by risk level based on keywords."""
@@ -52,50 +79,47 @@ def categorize_by_risk_level(records: List[str]) -> Dict[str, List[str]]:
         'low': []
     }
 
-    risk_keywords = {
-        'critical': ['critical', 'emergency', 'life-threatening', 'severe', 'intensive care'],
-        'high': ['high risk', 'serious', 'urgent', 'unstable'],
-        'medium': ['medium', 'moderate', 'stable'],
-        'low': ['low', 'mild', 'stable', 'routine']
-    }
-
     for record in records:
         record_lower = record.lower()
-        risk_found = 'low'  # default
-
-        for risk_level, keywords in risk_keywords.items():
-            if any(keyword in record_lower for keyword in keywords):
-                risk_found = risk_level
-                break
+        risk_found = next(
+            (risk_level for risk_level, keywords in _RISK_RULES
+             if any(keyword in record_lower for keyword in keywords)),
+            'low'  # default
+        )
 
         categories[risk_found].append(record)
 
     return categories
 
+@lru_cache(maxsize=128)
 def generate_simple_summary(patient_history: str) -> str:
-    """Generate a medical summary using basic text analysis."""
+    """Generate a medical summary using basic text analysis.
+
+    Results are cached per history, so reopening the same patient returns
+    the previous summary.
+    """
 
     # Split history into individual records
-    records = [r.strip() for r in patient_history.split('---') if r.strip()]
+    records = [r for r in _RECORD_SPLIT.split(patient_history.strip()) if r]
 
     if not records:
         return "No medical records found to summarize."
 
-    # Extract medical terms from all records
-    all_diseases = []
-    all_treatments = []
-    all_symptoms = []
+    # Count medical terms across all records
+    disease_counts = Counter()
+    treatment_counts = Counter()
+    symptom_counts = Counter()
 
     for record in records:
         terms = extract_medical_terms(record)
-        all_diseases.extend(terms['diseases'])
-        all_treatments.extend(terms['treatments'])
-        all_symptoms.extend(terms['symptoms'])
+        disease_counts.update(terms['diseases'])
+        treatment_counts.update(terms['treatments'])
+        symptom_counts.update(terms['symptoms'])
 
-    # Remove duplicates and get most common
-    diseases = [d for d, _ in Counter(all_diseases).most_common(3)]
-    treatments = [t for t, _ in Counter(all_treatments).most_common(3)]
-    symptoms = [s for s, _ in Counter(all_symptoms).most_common(3)]
+    # Get most common (most_common(n) is a heap selection, not a full sort)
+    diseases = [d for d, _ in disease_counts.most_common(3)]
+    treatments = [t for t, _ in treatment_counts.most_common(3)]
+    symptoms = [s for s, _ in symptom_counts.most_common(3)]
 
     # Categorize records by risk
     risk_categories = categorize_by_risk_level(records)
@@ -134,7 +158,7 @@ def main():
     """Main function to process patient history from stdin."""
     try:
         # Read input from stdin (JSON format)
-        input_data = json.load(sys.stdin)
+        input_data = loads(sys.stdin.buffer.read())
         patient_history = input_data.get('history', '')
 
         if not patient_history:
@@ -144,7 +168,7 @@ def main():
             result = {"summary": summary}
 
         # Output result as JSON
-        print(json.dumps(result))
+        sys.stdout.buffer.write(dumps(result) + b"\n")
 
     except Exception as e:
         error_result = {"error": f"Processing failed: {str(e)}"}
@@ -3,7 +3,9 @@
 Test script for prediction engine
 """
 
+import importlib.util
 import json
+import os
 import subprocess
 import sys
 
@@ -42,11 +44,53 @@ sample_patient_data = {
     ]
 }
 
+def load_prediction_engine():
+    """Import server/prediction-engine.py in-process (its file name has a dash)."""
+    server_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server')
+    # The scripts import their shared helpers (json_io) from server/
+    if server_dir not in sys.path:
+        sys.path.insert(0, server_dir)
+    path = os.path.join(server_dir, 'prediction-engine.py')
+    spec = importlib.util.spec_from_file_location('prediction_engine', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def print_prediction(pred):
+    """Print a prediction result in a readable form."""
+    print(f"\n=== PREDICTION RESULTS ===\n")
+    print(f"Overall Health Score: {pred['overallHealthScore']}/100")
+    print(f"Trend Direction: {pred['trendDirection'].upper()}\n")
+    
+    print("=== RISK PREDICTIONS ===")
+    for p in pred['predictions']:
+        print(f"\nCondition: {p['condition']}")
+        print(f"  Risk Score: {p['riskScore']}/100")
+        print(f"  Risk Level: {p['riskLevel'].upper()}")
+        print(f"  Confidence: {p['confidence']:.2%}")
+        print(f"  Factors: {', '.join(p['factors'])}")
+        print(f"  Recommendations:")
+        for rec in p['recommendations']:
+            print(f"    - {rec}")
+
 def test_prediction_engine():
-    """Test the prediction engine with sample data."""
+    """Test the prediction engine in-process with sample data."""
     print("Testing Prediction Engine...")
     print("=" * 60)
     
+    try:
+        engine = load_prediction_engine()
+        print_prediction(engine.calculate_disease_risk(sample_patient_data))
+    
+    except Exception as e:
+        print(f"Test failed: {e}")
+    
+    print("\n" + "=" * 60)
+
+def test_prediction_engine_cli():
+    """Test the stdin/stdout interface the server uses, once."""
+    print("\nTesting Prediction Engine CLI...")
+    
     input_data = {
         "patientData": sample_patient_data
     }
@@ -65,21 +109,7 @@ def test_prediction_engine():
         if process.returncode == 0:
             result = json.loads(stdout)
             if 'prediction' in result:
-                pred = result['prediction']
-                print(f"\n=== PREDICTION RESULTS ===\n")
-                print(f"Overall Health Score: {pred['overallHealthScore']}/100")
-                print(f"Trend Direction: {pred['trendDirection'].upper()}\n")
-                
-                print("=== RISK PREDICTIONS ===")
-                for p in pred['predictions']:
-                    print(f"\nCondition: {p['condition']}")
-                    print(f"  Risk Score: {p['riskScore']}/100")
-                    print(f"  Risk Level: {p['riskLevel'].upper()}")
-                    print(f"  Confidence: {p['confidence']:.2%}")
-                    print(f"  Factors: {', '.join(p['factors'])}")
-                    print(f"  Recommendations:")
-                    for rec in p['recommendations']:
-                        print(f"    - {rec}")
+                print(f"CLI returned {len(result['prediction']['predictions'])} predictions")
             else:
                 print(f"Error: {result.get('error', 'Unknown error')}")
         else:
@@ -94,3 +124,4 @@ def test_prediction_engine():
 
 if __name__ == "__main__":
     test_prediction_engine()
+    test_prediction_engine_cli()
@@ -3,7 +3,9 @@
 Test script for emergency summarizer
 """
 
+import importlib.util
 import json
+import os
 import subprocess
 import sys
 
@@ -36,47 +38,49 @@ Risk Level: medium
 Warnings: Monitor breathing difficulty
 ---"""
 
+def load_emergency_summarizer():
+    """Import server/emergency_summarizer.py in-process."""
+    server_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server')
+    # The scripts import their shared helpers (json_io) from server/
+    if server_dir not in sys.path:
+        sys.path.insert(0, server_dir)
+    path = os.path.join(server_dir, 'emergency_summarizer.py')
+    spec = importlib.util.spec_from_file_location('emergency_summarizer', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
 def test_emergency_summarizer():
-    """Test the emergency summarizer with sample data."""
+    """Test the emergency summarizer in-process with sample data."""
     print("Testing Emergency Summarizer...")
     print("=" * 60)
     
-    # Test with emergency mode ON
-    print("\n🚨 EMERGENCY MODE: ON\n")
-    input_data = {
-        "history": sample_history,
-        "emergencyMode": True
-    }
-    
     try:
-        process = subprocess.Popen(
-            ['python', 'server/emergency_summarizer.py'],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True
-        )
+        summarizer = load_emergency_summarizer()
         
-        stdout, stderr = process.communicate(input=json.dumps(input_data))
+        # Test with emergency mode ON
+        print("\n🚨 EMERGENCY MODE: ON\n")
+        print(summarizer.generate_emergency_summary(sample_history, True))
         
-        if process.returncode == 0:
-            result = json.loads(stdout)
-            if 'summary' in result:
-                print(result['summary'])
-            else:
-                print(f"Error: {result.get('error', 'Unknown error')}")
-        else:
-            print(f"Process failed with code {process.returncode}")
-            print(f"Error: {stderr}")
+        print("\n" + "=" * 60)
+        
+        # Test with emergency mode OFF
+        print("\n📋 EMERGENCY MODE: OFF\n")
+        print(summarizer.generate_emergency_summary(sample_history, False))
     
     except Exception as e:
         print(f"Test failed: {e}")
     
     print("\n" + "=" * 60)
+
+def test_emergency_summarizer_cli():
+    """Test the stdin/stdout interface used by the server, once."""
+    print("\nTesting Emergency Summarizer CLI...")
     
-    # Test with emergency mode OFF
-    print("\n📋 EMERGENCY MODE: OFF\n")
-    input_data['emergencyMode'] = False
+    input_data = {
+        "history": sample_history,
+        "emergencyMode": True
+    }
     
     try:
         process = subprocess.Popen(
@@ -92,7 +96,7 @@ def test_emergency_summarizer():
         if process.returncode == 0:
             result = json.loads(stdout)
             if 'summary' in result:
-                print(result['summary'])
+                print(f"CLI returned a {len(result['summary'])}-character summary")
             else:
                 print(f"Error: {result.get('error', 'Unknown error')}")
         else:
@@ -103,7 +107,41 @@ def test_emergency_summarizer():
         print(f"Test failed: {e}")
     
     print("\n" + "=" * 60)
-    print("\n✅ Test completed!")
+
+def test_emergency_summarizer_serve():
+    """Test the --serve worker: one response line per request line, in order."""
+    print("\nTesting Emergency Summarizer --serve...")
+    
+    requests = [
+        json.dumps({"history": sample_history, "emergencyMode": True}),
+        '{"history": not json',
+        json.dumps({}),
+        json.dumps({"history": "Date: 01/05/2024\nDisease: Asthma\nRisk Level: low",
+                    "emergencyMode": False})
+    ]
+    
+    process = subprocess.run(
+        ['python', 'server/emergency_summarizer.py', '--serve'],
+        input="\n".join(requests) + "\n",
+        capture_output=True,
+        text=True,
+        timeout=60
+    )
+    responses = [json.loads(line) for line in process.stdout.splitlines()]
+    
+    assert process.returncode == 0, process.stderr
+    assert len(responses) == len(requests), responses
+    assert 'Hypertension' in responses[0]['summary']
+    assert responses[1]['error'].startswith('Processing failed')
+    assert responses[2] == {"error": "No patient history provided"}
+    assert 'Asthma' in responses[3]['summary']
+    assert 'Hypertension' not in responses[3]['summary']
+    print(f"Worker answered {len(responses)} requests in order")
+    
+    print("\n" + "=" * 60)
 
 if __name__ == "__main__":
     test_emergency_summarizer()
+    test_emergency_summarizer_cli()
+    test_emergency_summarizer_serve()
+    print("\n✅ Test completed!")